@@ -1,14 +1,31 @@
 import asyncio
-import json
+import atexit
+import hashlib
+import heapq
+import io
+import itertools
 import os
+import pickle
+import random
+import tempfile
+import threading
 import time
+from collections import namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import timedelta
-from functools import partial
-from typing import List
+from functools import lru_cache, partial, wraps
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Tuple, Type
+from urllib.parse import urljoin
 
+import aiohttp
+import orjson
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
 import streamlit as st
+from fake_useragent import UserAgent
 from loguru import logger as log
 from search_engine_parser import BaiduSearch as _BaiduSearch
 from search_engine_parser import DuckDuckGoSearch as _DuckDuckGoSearch
@@ -17,21 +34,97 @@ from search_engine_parser import GoogleScholarSearch as _GoogleScholarSearch
 from search_engine_parser import GoogleSearch as _GoogleSearch
 from search_engine_parser.core.base import SearchItem, ReturnType
 from search_engine_parser.core.engines.google import EXTRA_PARAMS
-from search_engine_parser.core.engines.youtube import Search as YoutubeSearch
+from search_engine_parser.core.engines.youtube import Search as _YoutubeSearch
 from search_engine_parser.core.exceptions import NoResultsOrTrafficError
 from search_engine_parser.core.utils import CacheHandler as _CacheHandler
-from search_engine_parser.core.utils import FILEPATH
+from search_engine_parser.core.utils import FILEPATH, USER_AGENT_LIST
+from selectolax.parser import HTMLParser
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 SEARCH_RESULT_TTL_SECONDS = 120
+SEARCH_RESULT_HTML_TTL_SECONDS = int(os.getenv("SEARCH_RESULT_HTML_TTL", 3600))
+SEARCH_CACHE_DIR = os.getenv("SEARCH_CACHE_DIR", os.path.join(".cache", "cache"))
+REDIS_URL = os.getenv("REDIS_URL")
+REDIS_TIMEOUT_SECONDS = 2
+SEARCH_TIMEOUT_SECONDS = 15
+SEARCH_CONNECT_TIMEOUT_SECONDS = 5
+SEARCH_READ_TIMEOUT_SECONDS = 10
+
+
+class EventLoopThread:
+    """Event loop running forever in a daemon thread, so that the client
+    session and its connection pool outlive a single search."""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.session: Optional[aiohttp.ClientSession] = None
+        self._thread = threading.Thread(
+            target=self.loop.run_forever, name="navi-search-loop", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.close)
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=100, limit_per_host=10, enable_cleanup_closed=True
+            )
+            timeout = aiohttp.ClientTimeout(
+                sock_connect=SEARCH_CONNECT_TIMEOUT_SECONDS,
+                sock_read=SEARCH_READ_TIMEOUT_SECONDS,
+            )
+            self.session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        return self.session
+
+    async def close_session(self):
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+    def run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def close(self):
+        if self.loop.is_running():
+            self.run(self.close_session())
+            self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+# streamlit re-executes this script on every rerun, so module globals and
+# lru_caches only last for one run. Objects that should live for the whole
+# process are held by st.cache_resource and bound to a module global on each
+# run. streamlit only stores cached values from the script thread, so they
+# are resolved at module level rather than from the event loop thread.
+@st.cache_resource(show_spinner=False)
+def get_event_loop_thread() -> EventLoopThread:
+    return EventLoopThread()
+
+
+_loop_thread = get_event_loop_thread()
+
+
+async def get_session() -> aiohttp.ClientSession:
+    return await _loop_thread.get_session()
+
+
+def run_coro(coro):
+    return _loop_thread.run(coro)
 
 
 class ExpiringDict(dict):
     def __init__(self, ttl: int):
         super().__init__()
         self.ttl = ttl
+        # (expire time, seq, key) entries, stale ones are skipped on purge;
+        # seq breaks ties so keys never need to be ordered
+        self._heap: List[Tuple[float, int, Hashable]] = []
+        self._seq = itertools.count()
 
     def __setitem__(self, key, value):
-        super().__setitem__(key, (value, time.time()))
+        now = time.time()
+        super().__setitem__(key, (value, now))
+        heapq.heappush(self._heap, (now + self.ttl, next(self._seq), key))
+        self.purge(now)
 
     def __getitem__(self, key):
         value, timestamp = super().__getitem__(key)
@@ -50,10 +143,21 @@ class ExpiringDict(dict):
         except KeyError:
             return False
 
+    def purge(self, now: Optional[float] = None):
+        """Evict all expired entries."""
+        if now is None:
+            now = time.time()
+        while self._heap and self._heap[0][0] <= now:
+            _, _, key = heapq.heappop(self._heap)
+            entry = super().get(key)
+            # the key may have been deleted or set again since it was pushed
+            if entry is not None and entry[1] + self.ttl <= now:
+                super().__delitem__(key)
+
 
 class CacheHandler(_CacheHandler):
     def __init__(self):
-        self.cache = os.path.join(".cache", "cache")
+        self.cache = SEARCH_CACHE_DIR
         engine_path = os.path.join(FILEPATH, "engines")
         if not os.path.exists(self.cache):
             os.makedirs(self.cache)
@@ -66,27 +170,163 @@ class CacheHandler(_CacheHandler):
         for cache in self.engine_cache.values():
             if not os.path.exists(cache):
                 os.makedirs(cache)
+        # mkstemp creates private files, give cached pages the mode open()
+        # would, so replicas running as another user can read them
+        umask = os.umask(0)
+        os.umask(umask)
+        self.file_mode = 0o666 & ~umask
 
+    def get_cache_path(self, engine, url) -> str:
+        urlhash = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.engine_cache[engine.lower()], urlhash)
 
-class DuckDuckGoSearch(_DuckDuckGoSearch):
-    def get_cache_handler(self):
-        return CacheHandler()
+    def discard(self, engine, url):
+        try:
+            os.remove(self.get_cache_path(engine, url))
+        except FileNotFoundError:
+            pass
+
+    async def get_source(
+        self, engine, url, headers, cache=True, proxy=None, proxy_auth=None
+    ):
+        """Override the function to reuse the shared client session and expire
+        cached pages after `SEARCH_RESULT_HTML_TTL_SECONDS`."""
+        cache_path = self.get_cache_path(engine, url)
+        if (
+            cache
+            and os.path.exists(cache_path)
+            and time.time() - os.path.getmtime(cache_path)
+            < SEARCH_RESULT_HTML_TTL_SECONDS
+        ):
+            try:
+                with open(cache_path, "rb") as stream:
+                    return pickle.load(stream), True
+            except (OSError, EOFError, pickle.UnpicklingError) as e:
+                log.warning(f"Failed to read cached page {cache_path}: {e}")
+        get_vars = {"url": url, "headers": headers}
+        if proxy and proxy_auth:
+            auth = aiohttp.BasicAuth(*proxy_auth)
+            get_vars.update({"proxy": proxy, "proxy_auth": auth})
+
+        session = await get_session()
+        async with session.get(**get_vars) as resp:
+            html = await resp.text()
+            status = resp.status
+            redirected = bool(resp.history)
+        # don't cache error pages, e.g. the unusual traffic page, or pages
+        # reached by a redirect, which are usually a verification page
+        if status == 200 and not redirected:
+            # write to a temporary file and move it into place, so that
+            # readers sharing the cache dir never load a partial file
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(cache_path))
+            try:
+                with os.fdopen(fd, "wb") as stream:
+                    pickle.dump(html, stream)
+                os.chmod(tmp_path, self.file_mode)
+                os.replace(tmp_path, cache_path)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+        return html, False
+
+
+@st.cache_resource(show_spinner=False)
+def get_cache_handler() -> CacheHandler:
+    return CacheHandler()
+
+
+@st.cache_resource(show_spinner=False)
+def get_user_agent_generator() -> Optional[UserAgent]:
+    # UserAgent downloads its data set when created, only do it once
+    try:
+        return UserAgent()
+    except Exception as e:
+        log.warning(f"Failed to load user agents: {e}")
+        return None
 
 
-class GithubSearch(_GithubSearch):
-    def get_cache_handler(self):
-        return CacheHandler()
+# process wide, see get_event_loop_thread
+_cache_handler = get_cache_handler()
+_user_agent_generator = get_user_agent_generator()
 
 
-class GoogleScholarSearch(_GoogleScholarSearch):
-    def get_cache_handler(self):
-        return CacheHandler()
+def get_user_agent() -> str:
+    ua = _user_agent_generator
+    if ua is None:
+        return random.choice(USER_AGENT_LIST)
+    return ua.random
 
 
-class GoogleSearch(_GoogleSearch):
+class SharedResourcesMixin:
+    """Share the cache handler and user agents across requests, the engines
+    create new ones for every request by default."""
+
     def get_cache_handler(self):
-        return CacheHandler()
+        return _cache_handler
+
+    async def async_search(self, query=None, page=1, cache=True, **kwargs):
+        try:
+            return await super().async_search(query, page, cache, **kwargs)
+        except Exception:
+            # only keep pages that parsed, a captcha page served with status
+            # 200 would fail the query until it expires
+            url = self.get_search_url(query, page, **kwargs)
+            self.get_cache_handler().discard(self.name, url)
+            raise
+
+    def headers(self):
+        return {
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "User-Agent": get_user_agent(),
+        }
+
+
+class SelectolaxMixin:
+    """Parse pages with selectolax instead of BeautifulSoup, the engine must
+    override `parse_soup` and `parse_single_result` to work on its nodes."""
+
+    async def get_soup(self, url, cache, proxy, proxy_auth):
+        html = await self.get_source(url, cache, proxy, proxy_auth)
+        return HTMLParser(html)
 
+
+class DuckDuckGoSearch(SelectolaxMixin, SharedResourcesMixin, _DuckDuckGoSearch):
+    def parse_soup(self, soup):
+        return soup.css("div.result")
+
+    def parse_single_result(self, single_result, return_type=ReturnType.FULL, **kwargs):
+        """Override the function to parse selectolax nodes."""
+        rdict = SearchItem()
+        if return_type in (ReturnType.FULL, ReturnType.TITLE):
+            h2 = single_result.css_first("h2.result__title")
+            rdict["titles"] = h2.text().strip()
+
+        if return_type in (ReturnType.FULL, ReturnType.LINK):
+            link_tag = single_result.css_first("a.result__a")
+            if link_tag is not None:
+                rdict["links"] = link_tag.attributes.get("href")
+            else:
+                rdict["links"] = None
+
+        if return_type in (ReturnType.FULL, ReturnType.DESCRIPTION):
+            desc = single_result.css_first(".result__snippet")
+            rdict["descriptions"] = desc.text() if desc is not None else ""
+
+        if rdict["links"] is None:
+            return None
+        return rdict
+
+
+class GithubSearch(SharedResourcesMixin, _GithubSearch):
+    pass
+
+
+class GoogleScholarSearch(SharedResourcesMixin, _GoogleScholarSearch):
+    pass
+
+
+class GoogleSearch(SelectolaxMixin, SharedResourcesMixin, _GoogleSearch):
     def get_params(self, query=None, offset=None, page=None, **kwargs):
         params = {}
         params["start"] = (page - 1) * 10
@@ -99,11 +339,58 @@ class GoogleSearch(_GoogleSearch):
                 params[param] = kwargs[param]
         return params
 
+    def parse_soup(self, soup):
+        return soup.css('div[class="Gx5Zad fP1Qef xpd EtOod pkphOe"]')
 
-class BaiduSearch(_BaiduSearch):
-    def get_cache_handler(self):
-        return CacheHandler()
+    def parse_single_result(self, single_result, return_type=ReturnType.FULL, **kwargs):
+        """Override the function to parse selectolax nodes."""
+        # Some unneeded details shown such as suggestions should be ignore
+        if (
+            single_result.css_first("h2.wITvVb")
+            and single_result.css_first("div.LKSyXe")
+        ) or single_result.css_first("div.X7NTVe"):
+            return
+
+        results = SearchItem()
+        els = single_result.css("div.kCrYT")
+        if len(els) < 2:
+            return
+
+        # First div contains title and url
+        r_elem = els[0]
+        if return_type in (ReturnType.FULL, ReturnType.TITLE):
+            link_tag = r_elem.css_first("a")
+            if link_tag:
+                title = link_tag.css_first("h3").text()
+            else:
+                r_elem = els[1]
+                title = r_elem.css_first("div.BNeawe").text()
+            results["titles"] = title
 
+        if return_type in (ReturnType.FULL, ReturnType.LINK):
+            link_tag = r_elem.css_first("a")
+            if link_tag:
+                raw_url = urljoin(self.base_url, link_tag.attributes.get("href"))
+                results["raw_urls"] = raw_url
+                results["links"] = self.clean_url(raw_url)
+
+        if return_type in (ReturnType.FULL, ReturnType.DESCRIPTION):
+            # Second div contains description
+            desc_tag = els[1]
+            if return_type in (ReturnType.FULL, ReturnType.LINK) and not results.get(
+                "links"
+            ):
+                link_tag = desc_tag.css_first("a")
+                if link_tag:
+                    desc_tag = els[0]
+                    raw_url = urljoin(self.base_url, link_tag.attributes.get("href"))
+                    results["raw_urls"] = raw_url
+                    results["links"] = self.clean_url(raw_url)
+            results["descriptions"] = desc_tag.text()
+        return results
+
+
+class BaiduSearch(SharedResourcesMixin, _BaiduSearch):
     def get_params(self, query=None, page=None, offset=None, **kwargs):
         params = {}
         params["wd"] = query
@@ -134,6 +421,10 @@ class BaiduSearch(_BaiduSearch):
             return rdict
 
 
+class YoutubeSearch(SharedResourcesMixin, _YoutubeSearch):
+    pass
+
+
 _search_engines = {
     "Google": GoogleSearch(),
     "DuckDuckGo": DuckDuckGoSearch(),
@@ -146,9 +437,18 @@ _search_engines = {
 supported_search_engines = list(_search_engines.keys())
 
 
-def make_search_url(engine, keyword, **kwargs) -> str:
-    url = _search_engines[engine].get_search_url(keyword, **kwargs)
-    return url
+@st.cache_resource(show_spinner=False)
+def get_search_url_maker() -> Callable[..., str]:
+    # process wide, see get_event_loop_thread
+    @lru_cache(maxsize=1024)
+    def make_search_url(engine, keyword, **kwargs) -> str:
+        url = _search_engines[engine].get_search_url(keyword, **kwargs)
+        return url
+
+    return make_search_url
+
+
+make_search_url = get_search_url_maker()
 
 
 class SearchRequest:
@@ -158,6 +458,9 @@ class SearchRequest:
         self.page = page
         self.num_param = self.get_num_param(num_results)
         self.search_url = make_search_url(engine, keyword, page=page, **self.num_param)
+        # the url is fully determined by these, compare them instead of the url
+        self._key = (engine, keyword, page, tuple(self.num_param.items()))
+        self._hash = hash(self._key)
 
     def get_num_param(self, num_results):
         if self.engine == "Google":
@@ -169,19 +472,83 @@ class SearchRequest:
         return num_param
 
     def __eq__(self, other):
-        return self.search_url == other.search_url
+        # streamlit redefines this class on every rerun, so requests kept in
+        # session_state are instances of an older class object
+        return self._key == getattr(other, "_key", None)
 
     def __hash__(self):
-        return hash(self.search_url)
+        return self._hash
+
+
+@lru_cache(maxsize=None)
+def search_record_type(fields: Tuple[str, ...]) -> Type[tuple]:
+    # engines return different fields, one record type per field set
+    return namedtuple("SearchRecord", fields, rename=True)
+
+
+def to_str(value) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+def to_records(items: Iterable[SearchItem]) -> List[tuple]:
+    """Convert the engine's dict items to tuples with fixed fields."""
+    items = list(items)
+    fields = tuple(dict.fromkeys(key for item in items for key in item))
+    record_type = search_record_type(fields)
+    return [
+        record_type(*(to_str(item.get(field)) for field in fields)) for item in items
+    ]
+
+
+def results_to_columns(results: List[tuple]) -> Dict[str, List[Optional[str]]]:
+    return dict(zip(results[0]._fields, map(list, zip(*results))))
+
+
+def results_to_table(results: List[tuple]) -> pa.Table:
+    return pa.table(
+        {
+            key: pa.array(values, type=pa.string())
+            for key, values in results_to_columns(results).items()
+        }
+    )
+
+
+def results_to_ipc(results: List[tuple]) -> bytes:
+    table = results_to_table(results)
+    sink = pa.BufferOutputStream()
+    # SERP text compresses well, keep the cache entries small
+    options = pa.ipc.IpcWriteOptions(compression="zstd")
+    with pa.ipc.new_stream(sink, table.schema, options=options) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def results_from_ipc(data: bytes) -> List[tuple]:
+    table = pa.ipc.open_stream(data).read_all()
+    record_type = search_record_type(tuple(table.column_names))
+    columns = [column.to_pylist() for column in table.columns]
+    return [record_type(*values) for values in zip(*columns)]
 
 
 @dataclass()
 class SearchResponse:
     search_request: SearchRequest
-    results: List[SearchItem] = None
+    results: List[tuple] = None
     error_info: str = ""
 
 
+class SearchError(Exception):
+    pass
+
+
+def is_timeout(exc: BaseException) -> bool:
+    # the engines re-raise socket timeouts of the session as a plain
+    # Exception("ERROR: ..."), the original one is kept as its context
+    return isinstance(exc, asyncio.TimeoutError) or isinstance(
+        exc.__context__, asyncio.TimeoutError
+    )
+
+
 async def fetch_search_results(
     engine, keyword, page=1, num_results=10
 ) -> SearchResponse:
@@ -190,27 +557,147 @@ async def fetch_search_results(
     log.info(f"search url: {req.search_url}")
     try:
         search_engine = _search_engines[engine]
-        results = await search_engine.async_search(
-            keyword, page=page, **req.num_param, cache=False
+        results = await asyncio.wait_for(
+            search_engine.async_search(keyword, page=page, **req.num_param),
+            timeout=SEARCH_TIMEOUT_SECONDS,
         )
+        results = to_records(results)
     except NoResultsOrTrafficError as e:
         results = None
         error_msg = str(e)
         log.error(f"Search error: {e}")
+    except Exception as e:
+        if not is_timeout(e):
+            raise
+        results = None
+        error_msg = "搜索超时，请稍后重试。"
+        log.error(f"Search timeout: {req.search_url}")
     res = SearchResponse(req, results, error_msg)
     return res
 
 
-@st.cache_resource(ttl=timedelta(days=1), max_entries=100000)
-def search(search_engine, query_keyword, page_num, num_results) -> SearchResponse:
-    return asyncio.run(
-        fetch_search_results(
-            search_engine,
-            query_keyword,
-            page=page_num,
-            num_results=num_results,
-        )
+@st.cache_resource(show_spinner=False)
+def get_redis_client():
+    # one client and connection pool per process, see get_event_loop_thread
+    import redis
+
+    # fail fast so that an unreachable server falls back to a direct fetch
+    return redis.Redis.from_url(
+        REDIS_URL,
+        socket_timeout=REDIS_TIMEOUT_SECONDS,
+        socket_connect_timeout=REDIS_TIMEOUT_SECONDS,
+    )
+
+
+def shared_cache(ttl: timedelta):
+    """Cache the results in Redis when `REDIS_URL` is set, so that they are
+    shared across replicas. The function must return bytes, they are stored
+    as they are."""
+
+    def decorator(func):
+        if not REDIS_URL:
+            return func
+
+        import redis
+
+        @wraps(func)
+        def wrapper(*args):
+            digest = hashlib.sha256(repr(args).encode()).hexdigest()
+            key = f"navi-search:{func.__name__}:{digest}"
+            client = get_redis_client()
+            try:
+                data = client.get(key)
+            except redis.RedisError as e:
+                log.error(f"Redis error: {e}")
+                return func(*args)
+            if data is not None:
+                return data
+
+            value = func(*args)
+            try:
+                client.set(key, value, ex=ttl)
+            except redis.RedisError as e:
+                log.error(f"Redis error: {e}")
+            return value
+
+        return wrapper
+
+    return decorator
+
+
+@st.cache_data(ttl=timedelta(days=1), max_entries=100000, show_spinner=False)
+@shared_cache(ttl=timedelta(days=1))
+def search(search_engine, query_keyword, page, num_results) -> bytes:
+    res = run_coro(
+        fetch_search_results(search_engine, query_keyword, page, num_results)
     )
+    # raise instead of returning the error, so that failures are not cached
+    if not res.results:
+        raise SearchError(res.error_info)
+    # cache the results as an Arrow IPC stream, classes defined in this script
+    # can't be pickled when streamlit runs it
+    return results_to_ipc(res.results)
+
+
+class InflightCalls:
+    """Let concurrent calls with the same arguments share a single call,
+    its result as well as its exception."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[tuple, Future] = {}
+
+    def call(self, func, *args):
+        with self._lock:
+            future = self._calls.get(args)
+            leader = future is None
+            if leader:
+                future = self._calls[args] = Future()
+        if not leader:
+            return future.result()
+
+        try:
+            value = func(*args)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            with self._lock:
+                del self._calls[args]
+
+
+@st.cache_resource(show_spinner=False)
+def get_inflight_searches() -> InflightCalls:
+    # process wide, see get_event_loop_thread
+    return InflightCalls()
+
+
+_inflight_searches = get_inflight_searches()
+
+
+def search_pages(
+    search_engine, query_keyword, pages: Iterable[int], num_results
+) -> Dict[int, Future]:
+    # pages are cached one by one, search them from threads so that the
+    # uncached ones are fetched concurrently on the event loop
+    ctx = get_script_run_ctx()
+    with ThreadPoolExecutor(initializer=partial(add_script_run_ctx, ctx=ctx)) as pool:
+        return {
+            # st.cache_data shares the fetch of a page between sessions only
+            # when it succeeds, failures are shared by the in-flight call
+            page: pool.submit(
+                _inflight_searches.call,
+                search,
+                search_engine,
+                query_keyword,
+                page,
+                num_results,
+            )
+            for page in pages
+        }
 
 
 def search_preview(search_engine, query_keyword, page_num, num_results):
@@ -219,28 +706,55 @@ def search_preview(search_engine, query_keyword, page_num, num_results):
         return
 
     req = SearchRequest(search_engine, query_keyword, page_num, num_results)
+    st.session_state.last_committed_req = req
     if req in st.session_state.search_results:
         st.toast(f"已经搜索过该关键词，从缓存读取搜索结果，{SEARCH_RESULT_TTL_SECONDS} 秒后过期。")
         return
 
-    res = search(search_engine, query_keyword, page_num, num_results)
-    if res.results:
-        st.session_state.search_results[req] = res
-    else:
-        st.toast(":orange-background[没有查询到结果或者查询失败!]", icon="⚠️")
-        if res.error_info:
-            st.toast(res.error_info, icon="⚠️")
+    # prefetch the uncached previous pages along with the requested one
+    pages = [
+        p
+        for p in range(1, page_num + 1)
+        if SearchRequest(search_engine, query_keyword, p, num_results)
+        not in st.session_state.search_results
+    ]
+    with st.spinner("正在搜索..."):
+        futures = search_pages(search_engine, query_keyword, pages, num_results)
+    for page, future in futures.items():
+        try:
+            data = future.result()
+        except Exception as e:
+            log.error(f"Search error: {e}")
+            if page == page_num:
+                st.toast(":orange-background[没有查询到结果或者查询失败!]", icon="⚠️")
+                if str(e):
+                    st.toast(str(e), icon="⚠️")
+            continue
+        page_req = SearchRequest(search_engine, query_keyword, page, num_results)
+        res = SearchResponse(page_req, results_from_ipc(data))
+        st.session_state.search_results[page_req] = res
+
+
+def submit_search():
+    # the form only sends its inputs on submit, read them from the widget state
+    search_preview(
+        st.session_state.engine_selector,
+        st.session_state.keyword_input,
+        st.session_state.page_num_input,
+        st.session_state.num_results_input,
+    )
 
 
 def search_sidebar_frag():
     with st.sidebar:
         st.image("https://img.icons8.com/clouds/500/search.png", width=100)
         st.subheader(":blue[_Navi Search_]", divider="gray")
-        selected_engine = st.selectbox(
-            "选择搜索引擎", supported_search_engines, key="engine_selector"
-        )
-        query_keyword = st.text_input("请输入搜索关键词", value="脑洞部长", key="keyword_input")
-        page_num = st.number_input(
+    # editing the inputs in a form doesn't rerun the script and rebuild the
+    # preview, only submitting does
+    with st.sidebar.form("search_form", border=False):
+        st.selectbox("选择搜索引擎", supported_search_engines, key="engine_selector")
+        st.text_input("请输入搜索关键词", value="脑洞部长", key="keyword_input")
+        st.number_input(
             "分页",
             min_value=1,
             max_value=10,
@@ -249,7 +763,7 @@ def search_sidebar_frag():
             help="最多支持搜索 10 页结果",
             key="page_num_input",
         )
-        num_results = st.number_input(
+        st.number_input(
             "每页搜索结果数量",
             min_value=1,
             max_value=100,
@@ -258,24 +772,62 @@ def search_sidebar_frag():
             help="只有 Google 支持更改每页结果数量，最大 100",
             key="num_results_input",
         )
-        st.session_state.selected_engine = selected_engine
-        st.session_state.query_keyword = query_keyword
-        st.session_state.page_num = page_num
-        st.session_state.num_results = num_results
-        st.button(
+        st.form_submit_button(
             "搜索",
             use_container_width=True,
             type="primary",
-            on_click=partial(
-                search_preview,
-                selected_engine,
-                query_keyword,
-                page_num,
-                num_results,
-            ),
+            on_click=submit_search,
         )
 
 
+def make_md_links(titles: pa.ChunkedArray, links: pa.ChunkedArray) -> pa.ChunkedArray:
+    def lit(text):
+        return pa.scalar(text, titles.type)
+
+    # the last argument is the separator
+    return pc.binary_join_element_wise(
+        lit("["), titles, lit("]("), links, lit(")"), lit("")
+    )
+
+
+def join_lines(lines: pa.Array) -> str:
+    # wrap the lines into a single list value so the join happens in Arrow
+    # instead of materializing a Python list of strings
+    offsets = pa.array([0, len(lines)], type=pa.int32())
+    joined = pc.binary_join(
+        pa.ListArray.from_arrays(offsets, lines), pa.scalar("\n", lines.type)
+    )
+    return joined[0].as_py()
+
+
+def to_csv(table: pa.Table) -> str:
+    buf = io.BytesIO()
+    pa_csv.write_csv(table, buf)
+    return buf.getvalue().decode()
+
+
+@st.cache_resource(ttl=SEARCH_RESULT_TTL_SECONDS, show_spinner=False)
+def build_preview(req_key: tuple, _results: List[tuple]) -> dict:
+    # results are determined by the request key, so they are not hashed
+    # themselves; the artifacts are never mutated, share them instead of
+    # unpickling a copy on every rerun
+    table = results_to_table(_results)
+    table = pa.table(
+        [pc.fill_null(column, "") for column in table.columns],
+        names=table.column_names,
+    )
+    md_links = make_md_links(table["titles"], table["links"]).combine_chunks()
+    export_table = table.append_column("md_links", md_links)
+    return {
+        "df": table.to_pandas(types_mapper=pd.ArrowDtype),
+        "md": join_lines(md_links),
+        "json": orjson.dumps(
+            export_table.to_pylist(), option=orjson.OPT_INDENT_2
+        ).decode(),
+        "csv": to_csv(export_table),
+    }
+
+
 def welcome_frag():
     st.header("欢迎使用 :blue[_Navi Search_] 下载搜索结果", divider="rainbow")
     st.write(
@@ -285,24 +837,21 @@ def welcome_frag():
 
 def preview_frag():
     preview_cntr = st.container()
-    if not st.session_state.query_keyword:
+    # only follow the last submitted search, not the live sidebar inputs
+    req = st.session_state.get("last_committed_req")
+    if req is None:
         preview_cntr.info("请搜索关键词...")
         return
 
-    req = SearchRequest(
-        st.session_state.selected_engine,
-        st.session_state.query_keyword,
-        st.session_state.page_num,
-        st.session_state.num_results,
-    )
+    st.session_state.search_results.purge()
     # result cache expired or not found
     try:
         res = st.session_state.search_results[req]
     except KeyError:
         return
 
-    results_df = pd.DataFrame([dict(item) for item in res.results])
-    results_df = results_df.fillna("").astype(str)
+    artifacts = build_preview(req._key, res.results)
+    results_df = artifacts["df"]
     height = 410
     rows = len(results_df)
     if rows > 20:
@@ -321,21 +870,11 @@ def preview_frag():
             height=height,
         )
     with link_tab:
-        results_df["md_links"] = (
-            "[" + results_df["titles"] + "](" + results_df["links"] + ")"
-        )
-        st.code("\n".join(results_df["md_links"].to_list()), language="markdown")
+        st.code(artifacts["md"], language="markdown")
     with json_tab:
-        st.code(
-            json.dumps(
-                results_df.to_dict(orient="records"),
-                indent=2,
-                ensure_ascii=False,
-            ),
-            language="json",
-        )
+        st.code(artifacts["json"], language="json")
     with csv_tab:
-        st.code(results_df.to_csv(index=False), language="text")
+        st.code(artifacts["csv"], language="text")
 
 
 def main():